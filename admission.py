@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from time import monotonic, time
+from settings.admission_config import *
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, cost, now):
+        """Take cost tokens, return 0 on success or seconds to wait until enough tokens are refilled"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # batches bigger than the bucket need it full and leave it in debt for the rest of their cost
+        required = min(cost, self.capacity)
+        if self.tokens >= required:
+            self.tokens -= cost
+            return 0
+        return (required - self.tokens) / self.rate
+
+
+class AdmissionControl:
+    def __init__(self, rate=RATE_LIMIT, capacity=RATE_BURST, max_buckets=MAX_BUCKETS,
+                 shared_limit=SHARED_LIMIT, shared_window=SHARED_WINDOW, shared_backoff=SHARED_BACKOFF):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_buckets = max_buckets
+        self.shared_limit = shared_limit
+        self.shared_window = shared_window
+        self.shared_backoff = shared_backoff
+        self.shared_failed_at = None
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def admit(self, key, cost=1, store=None, deadline=None):
+        """Return 0 if request is admitted or seconds the client should wait before retrying"""
+        now = monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(self.rate, self.capacity, now)
+                if len(self.buckets) > self.max_buckets:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            wait = bucket.take(cost, now)
+        if wait or store is None or not self.shared_limit:
+            return wait
+        return self.admit_shared(key, cost, store, deadline)
+
+    def admit_shared(self, key, cost, store, deadline=None):
+        # fixed window counter shared by all workers, admits everything if store is unavailable
+        # and does not ask it again for shared_backoff seconds, so requests do not wait on connect timeouts
+        failed_at = self.shared_failed_at
+        if failed_at is not None and monotonic() - failed_at < self.shared_backoff:
+            return 0
+        now = time()
+        window = int(now // self.shared_window)
+        used = store.incr("rl:%s:%s" % (key, window), cost, self.shared_window, deadline=deadline)
+        if used is None:
+            self.shared_failed_at = monotonic()
+            return 0
+        self.shared_failed_at = None
+        if used <= self.shared_limit:
+            return 0
+        return (window + 1) * self.shared_window - now
@@ -5,13 +5,21 @@ import json
 from datetime import datetime
 import logging
 import hashlib
-import uuid
 from scoring import get_interests, get_score
-from optparse import OptionParser
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from store import Store
+from http.server import BaseHTTPRequestHandler
+from store import Store, DeadlineExceeded, check_deadline
 import re
-from settings.api_config import *
+from math import ceil
+from time import monotonic
+from admission import AdmissionControl
+from profiler import SamplingProfiler, SlowRequestProfiler
+from content_encoding import choose_encoding, compress
+from settings.api_config import (SALT, ADMIN_LOGIN, ADMIN_SALT, REQUEST_TIMEOUT, OK, BAD_REQUEST, FORBIDDEN,
+                                 NOT_FOUND, INVALID_REQUEST, TOO_MANY_REQUESTS, INTERNAL_ERROR, GATEWAY_TIMEOUT,
+                                 ERRORS, UNKNOWN, MALE, FEMALE, GENDERS)
+
+admission = AdmissionControl()
+profiler = SamplingProfiler()
 
 
 class AbstractField(object):
@@ -89,6 +97,12 @@ class ClientIDsField(AbstractField):
             raise ValueError("Clients list is empty: %s" % value)
 
 
+class PositiveIntField(AbstractField):
+    def validate(self, value):
+        if value is not None and (not isinstance(value, int) or value <= 0):
+            raise ValueError("Must be positive int: %s" % value)
+
+
 class ClientsInterestsRequest(object):
     client_ids = ClientIDsField(required=True)
     date = DateField(required=False, nullable=True)
@@ -118,6 +132,13 @@ class OnlineScoreRequest(object):
             raise AttributeError('Must be at least one pair: phone+email or first+last_name or gender+birthday')
 
 
+class ProfileRequest(object):
+    seconds = PositiveIntField(required=False, nullable=True)
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+
+
 class MethodRequest(object):
     account = CharField(required=False, nullable=True)
     login = CharField(required=True, nullable=True)
@@ -147,17 +168,35 @@ def check_auth(request):
     return False
 
 
+def request_cost(method_request):
+    if method_request.method == 'clients_interests':
+        client_ids = method_request.arguments.get('client_ids')
+        if isinstance(client_ids, list) and client_ids:
+            return len(client_ids)
+    return 1
+
+
 def method_handler(request, ctx, store):
     methods = {
         'online_score' : get_score_handler,
-        'clients_interests': get_interests_handler
+        'clients_interests': get_interests_handler,
+        'profile': profile_handler,
+        'stats': stats_handler
     }
     try:
         method_request = MethodRequest(**request['body'])
-        if check_auth(method_request):
-            response, code = methods[method_request.method](method_request, ctx, store)
-        else:
+        if not check_auth(method_request):
             response, code = ERRORS[FORBIDDEN], FORBIDDEN
+        else:
+            retry_after = admission.admit(method_request.account or method_request.login,
+                                          request_cost(method_request), store, deadline=ctx.get('deadline'))
+            if retry_after:
+                ctx['retry_after'] = ceil(retry_after)
+                response, code = ERRORS[TOO_MANY_REQUESTS], TOO_MANY_REQUESTS
+            else:
+                response, code = methods[method_request.method](method_request, ctx, store)
+    except DeadlineExceeded:
+        response, code = ERRORS[GATEWAY_TIMEOUT], GATEWAY_TIMEOUT
     except (TypeError, ValueError, AttributeError):
         response, code = ERRORS[INVALID_REQUEST], INVALID_REQUEST
     return response, code
@@ -171,7 +210,8 @@ def get_score_handler(method_request, ctx, store):
                       birthday=score_request.birthday,
                       gender=score_request.gender,
                       first_name=score_request.first_name,
-                      last_name=score_request.last_name)
+                      last_name=score_request.last_name,
+                      deadline=ctx.get('deadline'))
     ctx['has'] = method_request.arguments
     return {'score': score}, OK
 
@@ -179,7 +219,27 @@ def get_score_handler(method_request, ctx, store):
 def get_interests_handler(method_request, ctx, store):
     interests_request = ClientsInterestsRequest(**method_request.arguments)
     ctx['nclients'] = len(interests_request.client_ids)
-    return {client_id: get_interests(store, client_id) for client_id in interests_request.client_ids}, OK
+    deadline = ctx.get('deadline')
+    interests = {}
+    for client_id in interests_request.client_ids:
+        check_deadline(deadline)
+        interests[client_id] = get_interests(store, client_id, deadline=deadline)
+    return interests, OK
+
+
+def profile_handler(method_request, ctx, store):
+    if not method_request.is_admin:
+        return ERRORS[FORBIDDEN], FORBIDDEN
+    profile_request = ProfileRequest(**method_request.arguments)
+    if profile_request.seconds:
+        return {'started': profiler.start(profile_request.seconds), 'running': profiler.running}, OK
+    return {'running': profiler.running, 'stacks': profiler.result}, OK
+
+
+def stats_handler(method_request, ctx, store):
+    if not method_request.is_admin:
+        return ERRORS[FORBIDDEN], FORBIDDEN
+    return {'negative_cache': store.missing.stats()}, OK
 
 
 class MainHTTPHandler(BaseHTTPRequestHandler):
@@ -187,13 +247,25 @@ class MainHTTPHandler(BaseHTTPRequestHandler):
         "method": method_handler
     }
     store = Store()
+    slow_profiler = SlowRequestProfiler()
 
     def get_request_id(self, headers):
+        import uuid
         return headers.get('HTTP_X_REQUEST_ID', uuid.uuid4().hex)
 
+    def get_deadline(self, headers):
+        timeout = REQUEST_TIMEOUT
+        try:
+            requested = int(headers.get('X-Request-Timeout')) / 1000
+        except (TypeError, ValueError):
+            requested = 0
+        if requested > 0:
+            timeout = min(timeout, requested)
+        return monotonic() + timeout
+
     def do_POST(self):
         response, code = {}, OK
-        context = {"request_id": self.get_request_id(self.headers)}
+        context = {"request_id": self.get_request_id(self.headers), "deadline": self.get_deadline(self.headers)}
         request = None
         try:
             data_string = self.rfile.read(int(self.headers['Content-Length']))
@@ -205,32 +277,57 @@ class MainHTTPHandler(BaseHTTPRequestHandler):
             logging.info("%s: %s %s" % (self.path, data_string, context["request_id"]))
             if path in self.router:
                 try:
-                    response, code = self.router[path]({"body": request, "headers": self.headers}, context, self.store)
+                    with self.slow_profiler.profile(context["request_id"]):
+                        response, code = self.router[path]({"body": request, "headers": self.headers}, context,
+                                                           self.store)
                 except Exception as e:
                     logging.exception("Unexpected error: %s" % e)
                     code = INTERNAL_ERROR
             else:
                 code = NOT_FOUND
-        self.send_response(code)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
         if code not in ERRORS:
             r = {"response": response, "code": code}
         else:
             r = {"error": response or ERRORS.get(code, "Unknown Error"), "code": code}
         context.update(r)
         logging.info(context)
-        self.wfile.write(json.dumps(r).encode('utf8'))
+        body = json.dumps(r).encode('utf8')
+        encoding = choose_encoding(self.headers.get('Accept-Encoding'), len(body))
+        if encoding:
+            body = compress(body, encoding)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        if "retry_after" in context:
+            self.send_header("Retry-After", str(context["retry_after"]))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
         return
 
 
 if __name__ == "__main__":
+    from optparse import OptionParser
+    from http.server import HTTPServer
+    from snapshot import InterestsSnapshot
+
     op = OptionParser()
     op.add_option("-p", "--port", action="store", type=int, default=8080)
     op.add_option("-l", "--log", action="store", default=None)
+    op.add_option("-s", "--snapshot", action="store", default=None)
+    op.add_option("--profile-dir", action="store", default=None)
+    op.add_option("--slow-ms", action="store", type=int, default=None)
     (opts, args) = op.parse_args()
     logging.basicConfig(filename=opts.log, level=logging.INFO,
                         format='[%(asctime)s] %(levelname).1s %(message)s', datefmt='%Y.%m.%d %H:%M:%S')
+    if opts.snapshot:
+        MainHTTPHandler.store = Store(snapshot=InterestsSnapshot(opts.snapshot))
+    profiler.output_dir = opts.profile_dir
+    profiler.install_signal_handler()
+    if opts.slow_ms is not None:
+        MainHTTPHandler.slow_profiler = SlowRequestProfiler(opts.slow_ms / 1000, opts.profile_dir or ".")
     server = HTTPServer(("localhost", opts.port), MainHTTPHandler)
     logging.info("Starting server at %s" % opts.port)
     try:
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import random
+from time import perf_counter
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import content_encoding
+
+INTERESTS = ["cars", "pets", "travel", "hi-tech", "sport", "music", "books", "tv", "cinema", "geek", "otus"]
+LEVELS = {
+    "gzip": (1, 6, 9),
+    "zstd": (1, 3, 9, 19),
+}
+
+
+def interests_response(nclients, seed=0):
+    rnd = random.Random(seed)
+    response = {cid: rnd.sample(INTERESTS, 2) for cid in range(nclients)}
+    return json.dumps({"response": response, "code": 200}).encode('utf8')
+
+
+def measure(body, encoding, level, repeat):
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        compressed = content_encoding.compress(body, encoding, level)
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(compressed), best
+
+
+if __name__ == "__main__":
+    op = OptionParser()
+    op.add_option("-c", "--clients", action="store", default="10,100,1000,10000")
+    op.add_option("-n", "--repeat", action="store", type=int, default=5)
+    (opts, args) = op.parse_args()
+    encodings = [e for e in content_encoding.ENCODINGS if e != "zstd" or content_encoding.get_zstandard()]
+    print("%8s %6s %5s %10s %10s %7s %9s %10s" % ("clients", "codec", "level", "raw", "compressed",
+                                                  "ratio", "cpu, ms", "saved/ms"))
+    for nclients in map(int, opts.clients.split(",")):
+        body = interests_response(nclients)
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                size, elapsed = measure(body, encoding, level, opts.repeat)
+                print("%8s %6s %5s %10s %10s %7.2f %9.3f %10.0f" % (
+                    nclients, encoding, level, len(body), size, len(body) / size, elapsed * 1000,
+                    (len(body) - size) / (elapsed * 1000)))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import ast
+import sys
+import json
+import math
+import hashlib
+import logging
+import threading
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from time import perf_counter, sleep
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings.api_config import ADMIN_LOGIN, ADMIN_SALT
+
+# request line written by MainHTTPHandler.do_POST: "[time] I /path: b'body' request_id"
+LOG_LINE = re.compile(r"^\[(?P<time>[^\]]+)\] I (?P<path>/\S*): (?P<body>b(?P<q>['\"]).*(?P=q)) (?P<request_id>\S+)$")
+LOG_TIME_FORMAT = '%Y.%m.%d %H:%M:%S'
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_log(lines):
+    """Turn server log lines into trace records, requests logged within one second are spread evenly over it"""
+    records = []
+    for line in lines:
+        match = LOG_LINE.match(line.rstrip("\n"))
+        if not match:
+            continue
+        try:
+            body = json.loads(ast.literal_eval(match.group("body")))
+        except (ValueError, SyntaxError):
+            continue
+        records.append((datetime.strptime(match.group("time"), LOG_TIME_FORMAT), match.group("path"),
+                        body, match.group("request_id")))
+    trace = []
+    if not records:
+        return trace
+    start = records[0][0]
+    for second, group in groupby(records, key=lambda record: record[0]):
+        group = list(group)
+        for i, (_, path, body, request_id) in enumerate(group):
+            t = (second - start).total_seconds() + i / len(group)
+            trace.append({"t": t, "path": path, "body": body, "request_id": request_id})
+    return trace
+
+
+def load_trace(path):
+    """Read trace in capture format (json per line) or parse it from server log"""
+    with open(path, encoding="utf8") as f:
+        lines = f.readlines()
+    try:
+        return [json.loads(line) for line in lines if line.strip()]
+    except ValueError:
+        return parse_log(lines)
+
+
+def schedule(trace, rate=None, speed=1.0):
+    """Return (intended send offset, record) pairs: recorded timing scaled by speed or fixed rate"""
+    if rate:
+        return [(i / rate, record) for i, record in enumerate(trace)]
+    return [(record["t"] / speed, record) for record in trace]
+
+
+def admin_token():
+    return hashlib.sha512((datetime.now().strftime("%Y%m%d%H") + ADMIN_SALT).encode('utf8')).hexdigest()
+
+
+def percentile(values, p):
+    # nearest rank, values must be sorted
+    if not values:
+        return None
+    rank = max(math.ceil(p * len(values) / 100), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+class Replay:
+    def __init__(self, url, concurrency=16, timeout=10, resign_admin=False):
+        self.url = url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.resign_admin = resign_admin
+        self.results = defaultdict(list)
+        self.codes = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def send(self, record, intended, started_at):
+        body = dict(record["body"])
+        if self.resign_admin and body.get("login") == ADMIN_LOGIN:
+            body["token"] = admin_token()
+        request = urllib.request.Request(self.url + record["path"], data=json.dumps(body).encode('utf8'),
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        except (urllib.error.URLError, OSError):
+            code = "error"
+        # measured from the intended send time, so queueing behind slow requests is not hidden
+        latency = perf_counter() - started_at - intended
+        method = body.get("method", record["path"])
+        with self.lock:
+            self.results[method].append(latency)
+            self.codes[method][code] += 1
+
+    def run(self, plan):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            started_at = perf_counter()
+            for intended, record in plan:
+                delay = intended - (perf_counter() - started_at)
+                if delay > 0:
+                    sleep(delay)
+                executor.submit(self.send, record, intended, started_at)
+        return perf_counter() - started_at
+
+    def report(self, elapsed):
+        columns = ["p%s" % p for p in PERCENTILES] + ["max"]
+        lines = ["%-20s %7s %9s %s" % ("method", "count", "rps", " ".join("%9s" % c for c in columns))]
+        for method, latencies in sorted(self.results.items()):
+            latencies.sort()
+            values = [percentile(latencies, p) for p in PERCENTILES] + [latencies[-1]]
+            lines.append("%-20s %7s %9.1f %s" % (method, len(latencies), len(latencies) / elapsed,
+                                                 " ".join("%9.1f" % (v * 1000) for v in values)))
+            lines.append("%-20s codes: %s" % ("", ", ".join("%s=%s" % item for item in
+                                                           sorted(self.codes[method].items(), key=str))))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    op = OptionParser(usage="%prog [options] TRACE")
+    op.add_option("-u", "--url", action="store", default="http://127.0.0.1:8080")
+    op.add_option("-r", "--rate", action="store", type=float, default=None, help="requests per second")
+    op.add_option("-s", "--speed", action="store", type=float, default=1.0, help="recorded timing multiplier")
+    op.add_option("-c", "--concurrency", action="store", type=int, default=16)
+    op.add_option("--timeout", action="store", type=float, default=10)
+    op.add_option("--resign-admin", action="store_true", default=False)
+    op.add_option("--convert", action="store", default=None, help="write trace in capture format and exit")
+    (opts, args) = op.parse_args()
+    if len(args) != 1:
+        op.error("trace file is required")
+    logging.basicConfig(level=logging.INFO,
+                        format='[%(asctime)s] %(levelname).1s %(message)s', datefmt='%Y.%m.%d %H:%M:%S')
+    trace = load_trace(args[0])
+    if opts.convert:
+        with open(opts.convert, "w", encoding="utf8") as f:
+            for record in trace:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        logging.info(f'{len(trace)} requests written to {opts.convert}')
+        sys.exit(0)
+    logging.info(f'Replaying {len(trace)} requests against {opts.url}')
+    replay = Replay(opts.url, opts.concurrency, opts.timeout, opts.resign_admin)
+    elapsed = replay.run(schedule(trace, opts.rate, opts.speed))
+    print(replay.report(elapsed))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import subprocess
+from statistics import median
+from optparse import OptionParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+# heavy modules that must be imported on first use only
+LAZY_MODULES = ('redis', 'optparse', 'snapshot', 'cProfile', 'uuid')
+
+
+def measure(module):
+    """Import module in a fresh interpreter, return cumulative import time (us) of it and its direct imports"""
+    code = "import sys, %s; print(','.join(sorted(sys.modules)))" % module
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and len(match.group(3)) <= 3:
+            timings[match.group(4)] = int(match.group(2))
+    return timings, proc.stdout.strip().split(',')
+
+
+def run(module, repeat):
+    totals = []
+    timings, modules = {}, []
+    for _ in range(repeat):
+        timings, modules = measure(module)
+        totals.append(timings[module])
+    eager = [name for name in LAZY_MODULES if name in modules]
+    return median(totals), timings, eager
+
+
+if __name__ == "__main__":
+    op = OptionParser()
+    op.add_option("-m", "--module", action="store", default="api")
+    op.add_option("-n", "--repeat", action="store", type=int, default=10)
+    op.add_option("--max-ms", action="store", type=float, default=None)
+    op.add_option("--top", action="store", type=int, default=10)
+    (opts, args) = op.parse_args()
+    total, timings, eager = run(opts.module, opts.repeat)
+    print("import %s: %.1f ms (median of %s)" % (opts.module, total / 1000, opts.repeat))
+    for name, value in sorted(timings.items(), key=lambda x: -x[1])[1:opts.top + 1]:
+        print("  %-30s %8.1f ms" % (name, value / 1000))
+    failed = False
+    if eager:
+        print("imported eagerly: %s" % ", ".join(eager))
+        failed = True
+    if opts.max_ms is not None and total / 1000 > opts.max_ms:
+        print("startup regression: %.1f ms > %.1f ms" % (total / 1000, opts.max_ms))
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,67 @@
+import zlib
+from settings.compression_config import *
+
+# preferred first, zstd is used only when zstandard package is installed
+ENCODINGS = ('zstd', 'gzip')
+zstandard = None
+
+
+def get_zstandard():
+    """Return zstandard module or False if it is not installed, imported on first use"""
+    global zstandard
+    if zstandard is None:
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = False
+    return zstandard
+
+
+def parse_accept_encoding(header):
+    codings = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header, size, min_size=COMPRESS_MIN_SIZE):
+    """Return content coding for a body of given size or None to send it as is"""
+    if size < min_size:
+        return None
+    codings = parse_accept_encoding(header)
+    default = codings.get('*', 0)
+    best, best_q = None, 0
+    # highest client q wins, ENCODINGS order only breaks ties
+    for encoding in ENCODINGS:
+        if encoding == 'zstd' and not get_zstandard():
+            continue
+        q = codings.get(encoding, default)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressor(encoding, level=None):
+    """Return streaming compressor with compress(data) and flush() methods"""
+    if encoding == 'gzip':
+        return zlib.compressobj(GZIP_LEVEL if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == 'zstd' and get_zstandard():
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL if level is None else level).compressobj()
+    raise ValueError("Unsupported encoding: %s" % encoding)
+
+
+def compress(body, encoding, level=None):
+    c = compressor(encoding, level)
+    return c.compress(body) + c.flush()
@@ -0,0 +1,121 @@
+import os
+import re
+import sys
+import signal
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import monotonic, sleep, strftime
+from settings.profile_config import *
+
+UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def collapse(frame, thread_name):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append("%s (%s:%s)" % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ";".join(reversed(stack))
+
+
+def sample(seconds, interval=PROFILE_INTERVAL):
+    """Sample stacks of all threads but the current one, return counts of collapsed stacks"""
+    own = threading.get_ident()
+    stacks = Counter()
+    end = monotonic() + seconds
+    while monotonic() < end:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                stacks[collapse(frame, names.get(ident, str(ident)))] += 1
+        sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks):
+    # one "frame;frame;frame count" line per stack, the input format of flamegraph.pl and speedscope
+    return "\n".join("%s %s" % (stack, count) for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir=None, interval=PROFILE_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.thread = None
+        self.result = None
+        self.lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=PROFILE_SECONDS, blocking=True):
+        if not self.lock.acquire(blocking):
+            return False
+        try:
+            if self.running:
+                return False
+            self.thread = threading.Thread(target=self.run, args=(min(seconds, PROFILE_MAX_SECONDS),),
+                                           name="profiler", daemon=True)
+            self.thread.start()
+            return True
+        finally:
+            self.lock.release()
+
+    def run(self, seconds):
+        logging.info(f'Profiling for {seconds}s')
+        self.result = format_collapsed(sample(seconds, self.interval))
+        if self.output_dir:
+            path = os.path.join(self.output_dir, "profile-%s.collapsed" % strftime("%Y%m%d-%H%M%S"))
+            with open(path, "w") as f:
+                f.write(self.result + "\n")
+            logging.info(f'Profile written to {path}')
+
+    def install_signal_handler(self, signum=None):
+        if signum is None:
+            signum = getattr(signal, 'SIGUSR1', None)
+            if signum is None:
+                logging.info('SIGUSR1 is not available, profiling by signal is disabled')
+                return False
+        # the handler runs in the main thread, which may be holding the lock inside start() already
+        signal.signal(signum, lambda signum, frame: self.start(blocking=False))
+        return True
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold=None, output_dir="."):
+        self.threshold = threshold
+        self.output_dir = output_dir
+
+    def file_name(self, name):
+        import uuid
+        # name comes from the client (request id header), it must not leave output_dir
+        safe = UNSAFE_NAME_CHARS.sub('_', os.path.basename(str(name)))[:64]
+        return "%s-%s" % (safe, uuid.uuid4().hex) if safe else uuid.uuid4().hex
+
+    @contextmanager
+    def profile(self, name):
+        profile = None
+        if self.threshold is not None:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is already active in this interpreter
+                profile = None
+        started = monotonic()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                elapsed = monotonic() - started
+                if elapsed >= self.threshold:
+                    path = os.path.join(self.output_dir, "%s.prof" % self.file_name(name))
+                    profile.dump_stats(path)
+                    logging.info(f'Slow request {name}: {elapsed:.3f}s, profile written to {path}')
@@ -1,9 +1,10 @@
 import hashlib
 import json
 from datetime import datetime
+from store import DeadlineExceeded
 
 
-def get_score(store, phone, email, birthday=None, gender=None, first_name=None, last_name=None):
+def get_score(store, phone, email, birthday=None, gender=None, first_name=None, last_name=None, deadline=None):
     key_parts = [
         first_name or "",
         last_name or "",
@@ -12,10 +13,11 @@ def get_score(store, phone, email, birthday=None, gender=None, first_name=None,
     ]
     key = "uid:" + hashlib.md5("".join(str(key) for key in key_parts).encode('utf8')).hexdigest()
     # try get from cache,
-    # fallback to heavy calculation in case of cache miss
+    # fallback to heavy calculation in case of cache miss,
+    # spent budget only cuts off store work, the score itself is cheap
     try:
-        value = store.cache_get(key)
-    except ConnectionError:
+        value = store.cache_get(key, deadline=deadline)
+    except (ConnectionError, DeadlineExceeded):
         value = None
     score = json.loads(value) if value else 0
     if score:
@@ -30,15 +32,25 @@ def get_score(store, phone, email, birthday=None, gender=None, first_name=None,
         score += 0.5
     # cache for 60 minutes
     try:
-        store.cache_set(key, score, 60 * 60)
-    except ConnectionError:
+        store.cache_set(key, score, 60 * 60, deadline=deadline)
+    except (ConnectionError, DeadlineExceeded):
         pass
     finally:
         return score
 
 
-def get_interests(store, cid):
-    r = store.get("i:%s" % cid)
+def get_interests(store, cid, deadline=None):
+    # try local snapshot first,
+    # fallback to store for ids exported after it was built
+    r = store.snapshot.get(cid) if store.snapshot is not None else None
+    if r is None:
+        key = "i:%s" % cid
+        # ids recently found missing are not requested again until ttl expires
+        if key in store.missing:
+            raise ValueError('Not found in store')
+        r = store.get(key, deadline=deadline)
+        if not r:
+            store.missing.add(key)
     if r:
         return json.loads(r)
     else:
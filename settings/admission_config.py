@@ -0,0 +1,6 @@
+RATE_LIMIT = 50
+RATE_BURST = 100
+MAX_BUCKETS = 10000
+SHARED_LIMIT = None
+SHARED_WINDOW = 1
+SHARED_BACKOFF = 5
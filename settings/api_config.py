@@ -2,19 +2,26 @@ SALT = "Otus"
 ADMIN_LOGIN = "admin"
 ADMIN_SALT = "42"
 
+# seconds, also the upper bound for X-Request-Timeout header (milliseconds)
+REQUEST_TIMEOUT = 10
+
 OK = 200
 BAD_REQUEST = 400
 FORBIDDEN = 403
 NOT_FOUND = 404
 INVALID_REQUEST = 422
+TOO_MANY_REQUESTS = 429
 INTERNAL_ERROR = 500
+GATEWAY_TIMEOUT = 504
 
 ERRORS = {
     BAD_REQUEST: "Bad Request",
     FORBIDDEN: "Forbidden",
     NOT_FOUND: "Not Found",
     INVALID_REQUEST: "Invalid Request",
+    TOO_MANY_REQUESTS: "Too Many Requests",
     INTERNAL_ERROR: "Internal Server Error",
+    GATEWAY_TIMEOUT: "Gateway Timeout",
 }
 
 UNKNOWN = 0
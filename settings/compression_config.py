@@ -0,0 +1,3 @@
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
@@ -0,0 +1,3 @@
+PROFILE_INTERVAL = 0.005
+PROFILE_SECONDS = 10
+PROFILE_MAX_SECONDS = 60
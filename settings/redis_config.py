@@ -4,3 +4,5 @@ SOCKET_TIMEOUT = 3
 SOCKET_CONNECT_TIMEOUT = 3
 ATTEMPTS = 5
 RETRY_DELAY = 1
+NEGATIVE_CACHE_SIZE = 10000
+NEGATIVE_CACHE_TTL = 30
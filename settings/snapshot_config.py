@@ -0,0 +1,2 @@
+SNAPSHOT_CHECK_INTERVAL = 5
+SNAPSHOT_EXPORT_BATCH = 1000
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import mmap
+import struct
+import logging
+from time import monotonic
+from settings.snapshot_config import *
+
+# file layout: header, sorted index of (client_id, offset, length), packed blob of raw interests
+MAGIC = b'ISNP'
+VERSION = 1
+HEADER = struct.Struct('<4sIQ')
+ENTRY = struct.Struct('<qQI')
+
+
+def build(path, items):
+    """Write snapshot of (client_id, raw_interests) pairs to path atomically"""
+    items = sorted(items)
+    blob_start = HEADER.size + ENTRY.size * len(items)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(items)))
+        offset = blob_start
+        for cid, value in items:
+            f.write(ENTRY.pack(cid, offset, len(value)))
+            offset += len(value)
+        for _, value in items:
+            f.write(value)
+    os.replace(tmp_path, path)
+    return len(items)
+
+
+def export(store, path, batch=SNAPSHOT_EXPORT_BATCH):
+    """Dump all i:<cid> keys from redis into snapshot file"""
+    items = []
+    keys = []
+
+    def flush():
+        for key, value in zip(keys, store.store.mget(keys)):
+            if value is not None:
+                items.append((int(key[2:]), value))
+        keys.clear()
+
+    for key in store.store.scan_iter(match='i:*', count=batch):
+        if not key[2:].isdigit():
+            continue
+        keys.append(key)
+        if len(keys) >= batch:
+            flush()
+    if keys:
+        flush()
+    return build(path, items)
+
+
+class InterestsSnapshot:
+    def __init__(self, path, check_interval=SNAPSHOT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.view = (None, 0)
+        self.version = None
+        self.checked_at = monotonic()
+        self.load()
+
+    def load(self):
+        try:
+            st = os.stat(self.path)
+        except OSError as e:
+            logging.info(f'Snapshot not available: {e}')
+            return
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if version == self.version:
+            return
+        # bad file is remembered by version and skipped, requests keep using the previous view
+        self.version = version
+        try:
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logging.error(f'Snapshot not loaded: {self.path}: {e}')
+            return
+        magic, file_version, count = HEADER.unpack_from(mm, 0) if len(mm) >= HEADER.size else (None, None, 0)
+        if magic != MAGIC or file_version != VERSION or len(mm) < HEADER.size + count * ENTRY.size:
+            mm.close()
+            logging.error(f'Bad snapshot file: {self.path}')
+            return
+        # readers take the whole tuple at once, old mapping is released when the last one is done
+        self.view = (mm, count)
+        logging.info(f'Snapshot loaded: {self.path}, clients: {count}')
+
+    def maybe_reload(self):
+        now = monotonic()
+        if now - self.checked_at >= self.check_interval:
+            self.checked_at = now
+            self.load()
+
+    def get(self, cid):
+        self.maybe_reload()
+        mm, count = self.view
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset, length = ENTRY.unpack_from(mm, HEADER.size + mid * ENTRY.size)
+            if key < cid:
+                lo = mid + 1
+            elif key > cid:
+                hi = mid
+            else:
+                return mm[offset:offset + length]
+        return None
+
+    def __len__(self):
+        return self.view[1]
+
+
+if __name__ == "__main__":
+    from optparse import OptionParser
+    from store import Store
+
+    op = OptionParser()
+    op.add_option("-o", "--output", action="store", default="interests.snapshot")
+    op.add_option("--host", action="store", default=None)
+    op.add_option("--port", action="store", type=int, default=None)
+    (opts, args) = op.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='[%(asctime)s] %(levelname).1s %(message)s', datefmt='%Y.%m.%d %H:%M:%S')
+    kwargs = {k: v for k, v in (("host", opts.host), ("port", opts.port)) if v is not None}
+    count = export(Store(**kwargs), opts.output)
+    logging.info(f'Exported {count} clients to {opts.output}')
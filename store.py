@@ -1,18 +1,33 @@
-import redis
+import os
 import logging
+import threading
+from collections import OrderedDict
 from functools import wraps
-from time import sleep
+from time import sleep, monotonic
 from settings.redis_config import *
 
 
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def check_deadline(deadline):
+    if deadline is not None and monotonic() >= deadline:
+        raise DeadlineExceeded
+
+
 def reconnect(func):
     @wraps(func)
-    def wrapper(*args, **kwargs):
+    def wrapper(*args, deadline=None, **kwargs):
         for i in range(args[0].attempts):
+            check_deadline(deadline)
             try:
                 value = func(*args, **kwargs)
             except Exception as e:
                 logging.info(f'{e}, attempt_no: {i}')
+                # do not sleep if the request is going to be timed out anyway
+                if deadline is not None and monotonic() + RETRY_DELAY >= deadline:
+                    raise DeadlineExceeded
                 sleep(RETRY_DELAY)
             else:
                 return value
@@ -20,30 +35,106 @@ def reconnect(func):
     return wrapper
 
 
+class NegativeCache:
+    """Bounded set of keys known to be missing, each remembered for ttl seconds"""
+    def __init__(self, size=NEGATIVE_CACHE_SIZE, ttl=NEGATIVE_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.keys = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __contains__(self, key):
+        with self.lock:
+            expires = self.keys.get(key)
+            if expires is not None:
+                if expires > monotonic():
+                    self.hits += 1
+                    return True
+                del self.keys[key]
+            self.misses += 1
+            return False
+
+    def add(self, key):
+        with self.lock:
+            self.keys[key] = monotonic() + self.ttl
+            self.keys.move_to_end(key)
+            if len(self.keys) > self.size:
+                self.keys.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            if self.keys.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            now = monotonic()
+            for key in [key for key, expires in self.keys.items() if expires <= now]:
+                del self.keys[key]
+            return {'size': len(self.keys), 'hits': self.hits, 'misses': self.misses,
+                    'invalidations': self.invalidations}
+
+
 class Store:
-    def __init__(self, host=HOST, port=PORT):
-        self.store = redis.Redis(host=host,
-                                 port=port,
-                                 socket_timeout=SOCKET_TIMEOUT,
-                                 socket_connect_timeout=SOCKET_CONNECT_TIMEOUT)
+    def __init__(self, host=HOST, port=PORT, snapshot=None):
+        self.host = host
+        self.port = port
+        self.snapshot = snapshot
         self.attempts = ATTEMPTS
+        # only writes made through this store invalidate it, other workers wait for ttl
+        self.missing = NegativeCache()
+        self.client = None
+        self.exceptions = None
+        self.pid = None
+
+    @property
+    def store(self):
+        # redis is imported and connected on first use,
+        # forked workers get their own connection pool instead of sharing parent sockets
+        if self.client is None or self.pid != os.getpid():
+            import redis
+            self.client = redis.Redis(host=self.host,
+                                      port=self.port,
+                                      socket_timeout=SOCKET_TIMEOUT,
+                                      socket_connect_timeout=SOCKET_CONNECT_TIMEOUT)
+            self.exceptions = redis.exceptions
+            self.pid = os.getpid()
+        return self.client
 
     @reconnect
     def cache_get(self, key):
+        client = self.store
         try:
-            return self.store.get(key)
-        except redis.exceptions.ConnectionError:
+            return client.get(key)
+        except self.exceptions.ConnectionError:
             return
 
     @reconnect
     def cache_set(self, key, value, store_time=None):
+        client = self.store
         try:
-            self.store.set(key, value)
+            client.set(key, value)
             if store_time:
-                self.store.expire(key, store_time)
-        except redis.exceptions.ConnectionError:
+                client.expire(key, store_time)
+        except self.exceptions.ConnectionError:
             pass
 
+    def incr(self, key, amount=1, store_time=None, deadline=None):
+        # no retries: used on the admission path where waiting is worse than skipping
+        check_deadline(deadline)
+        client = self.store
+        try:
+            pipe = client.pipeline()
+            pipe.incrby(key, amount)
+            if store_time:
+                pipe.expire(key, store_time)
+            return pipe.execute()[0]
+        except (self.exceptions.ConnectionError, self.exceptions.TimeoutError):
+            return
+
     @reconnect
     def get(self, key):
         return self.store.get(key)
@@ -52,3 +143,5 @@ class Store:
     @reconnect
     def set(self, key, value):
         self.store.set(key, value)
+        if key.startswith('i:'):
+            self.missing.discard(key)
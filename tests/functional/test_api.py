@@ -1,5 +1,14 @@
 import hashlib
 import datetime
+import os
+import tempfile
+import urllib.error
+import gzip
+import json
+import threading
+import urllib.request
+from http.server import HTTPServer
+import time
 import unittest
 from store import Store
 import api
@@ -137,6 +146,100 @@ class TestSuite(unittest.TestCase):
         _, code = self.get_response(request)
         self.assertEqual(api.INVALID_REQUEST, code)
 
+    @cases([
+        {"client_ids": [1, 2], "date": "19.07.2017"}
+    ])
+    @mock.patch('store.Store.get')
+    def test_too_many_requests(self, arguments, mocked_get):
+        request = {"account": "horns&hoofs", "login": "h&f", "method": "clients_interests", "arguments": arguments}
+        self.set_valid_auth(request)
+        with mock.patch('api.admission', api.AdmissionControl(rate=1, capacity=2)):
+            mocked_get.return_value = '["cars"]'
+            _, code = self.get_response(request)
+            self.assertEqual(api.OK, code)
+            mocked_get.reset_mock()
+            _, code = self.get_response(request)
+        self.assertEqual(api.TOO_MANY_REQUESTS, code)
+        self.assertEqual(self.context.get("retry_after"), 2)
+        mocked_get.assert_not_called()
+
+    @cases([
+        {"client_ids": [1, 2], "date": "19.07.2017"}
+    ])
+    @mock.patch('store.Store.get')
+    def test_interests_request_deadline_exceeded(self, arguments, mocked_get):
+        request = {"account": "horns&hoofs", "login": "h&f", "method": "clients_interests", "arguments": arguments}
+        self.set_valid_auth(request)
+        self.context["deadline"] = time.monotonic()
+        _, code = self.get_response(request)
+        self.assertEqual(api.GATEWAY_TIMEOUT, code)
+        mocked_get.assert_not_called()
+
+    def test_profile_request_not_admin(self):
+        request = {"account": "horns&hoofs", "login": "h&f", "method": "profile", "arguments": {"seconds": 1}}
+        self.set_valid_auth(request)
+        _, code = self.get_response(request)
+        self.assertEqual(api.FORBIDDEN, code)
+
+    @cases([
+        {"seconds": 0},
+        {"seconds": -1},
+        {"seconds": "1"},
+    ])
+    def test_invalid_profile_request(self, arguments):
+        request = {"account": "horns&hoofs", "login": "admin", "method": "profile", "arguments": arguments}
+        self.set_valid_auth(request)
+        _, code = self.get_response(request)
+        self.assertEqual(api.INVALID_REQUEST, code, arguments)
+
+    @mock.patch('api.profiler')
+    def test_ok_profile_request(self, mocked_profiler):
+        request = {"account": "horns&hoofs", "login": "admin", "method": "profile", "arguments": {"seconds": 5}}
+        self.set_valid_auth(request)
+        response, code = self.get_response(request)
+        self.assertEqual(api.OK, code)
+        mocked_profiler.start.assert_called_once_with(5)
+        request["arguments"] = {}
+        mocked_profiler.result = "main;serve_forever 1"
+        response, code = self.get_response(request)
+        self.assertEqual(api.OK, code)
+        self.assertEqual(response["stacks"], "main;serve_forever 1")
+
+    @cases([
+        {"account": "horns&hoofs", "login": "h&f", "method": "stats", "arguments": {}, "code": api.FORBIDDEN},
+        {"account": "horns&hoofs", "login": "admin", "method": "stats", "arguments": {}, "code": api.OK},
+    ])
+    def test_stats_request(self, request):
+        expected = request.pop("code")
+        self.set_valid_auth(request)
+        response, code = self.get_response(request)
+        self.assertEqual(expected, code)
+        if code == api.OK:
+            self.assertEqual(response["negative_cache"]["size"], 0)
+
+    @mock.patch('store.Store.cache_get', side_effect=api.DeadlineExceeded)
+    def test_score_request_deadline_exceeded_on_cache(self, mocked_cache_get):
+        arguments = {"phone": "79175002040", "email": "stupnikov@otus.ru"}
+        request = {"account": "horns&hoofs", "login": "h&f", "method": "online_score", "arguments": arguments}
+        self.set_valid_auth(request)
+        self.context["deadline"] = time.monotonic()
+        response, code = self.get_response(request)
+        self.assertEqual(api.OK, code)
+        self.assertEqual(response.get("score"), 3)
+
+    @cases([
+        ({}, api.REQUEST_TIMEOUT),
+        ({"X-Request-Timeout": "500"}, 0.5),
+        ({"X-Request-Timeout": str(api.REQUEST_TIMEOUT * 2000)}, api.REQUEST_TIMEOUT),
+        ({"X-Request-Timeout": "0"}, api.REQUEST_TIMEOUT),
+        ({"X-Request-Timeout": "-5"}, api.REQUEST_TIMEOUT),
+        ({"X-Request-Timeout": "XXX"}, api.REQUEST_TIMEOUT),
+    ])
+    def test_request_deadline(self, headers, timeout):
+        started = time.monotonic()
+        deadline = api.MainHTTPHandler.get_deadline(None, headers)
+        self.assertAlmostEqual(deadline - started, timeout, delta=0.1)
+
     @cases([
         {"phone": "79175002040", "email": "stupnikov@otus.ru"}
     ])
@@ -152,3 +255,50 @@ class TestSuite(unittest.TestCase):
         self.assertEqual(api.OK, code, arguments)
         score = response.get("score")
         self.assertEqual(score, 42)
+
+
+class TestHTTP(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("localhost", 0), api.MainHTTPHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, request, headers):
+        url = "http://localhost:%s/method/" % self.server.server_port
+        http_request = urllib.request.Request(url, data=json.dumps(request).encode('utf8'), headers=headers)
+        with urllib.request.urlopen(http_request) as http_response:
+            return http_response.headers, http_response.read()
+
+    @cases([
+        ({}, 1000, None),
+        ({"Accept-Encoding": "gzip"}, 1, None),
+        ({"Accept-Encoding": "gzip"}, 1000, "gzip"),
+    ])
+    @mock.patch('store.Store.get')
+    def test_response_compression(self, headers, nclients, encoding, mocked_get):
+        mocked_get.return_value = '["cars", "pets", "travel"]'
+        request = {"account": "horns&hoofs", "login": "admin", "method": "clients_interests",
+                   "arguments": {"client_ids": list(range(nclients))},
+                   "token": hashlib.sha512((datetime.datetime.now().strftime("%Y%m%d%H") +
+                                            api.ADMIN_SALT).encode('utf8')).hexdigest()}
+        with mock.patch('api.admission', api.AdmissionControl(capacity=nclients)):
+            response_headers, body = self.post(request, headers)
+        self.assertEqual(response_headers.get("Content-Encoding"), encoding)
+        self.assertEqual(int(response_headers["Content-Length"]), len(body))
+        if encoding:
+            body = gzip.decompress(body)
+        self.assertEqual(len(json.loads(body)["response"]), nclients)
+
+    def test_slow_request_profile_path(self):
+        with tempfile.TemporaryDirectory() as parent:
+            output_dir = os.path.join(parent, "profiles")
+            os.mkdir(output_dir)
+            with mock.patch.object(api.MainHTTPHandler, 'slow_profiler', api.SlowRequestProfiler(0, output_dir)):
+                with self.assertRaises(urllib.error.HTTPError) as e:
+                    self.post({"method": "online_score"}, {"HTTP_X_REQUEST_ID": "../escaped"})
+            self.assertEqual(e.exception.code, api.INVALID_REQUEST)
+            self.assertEqual(os.listdir(parent), ["profiles"])
+            self.assertEqual(len(os.listdir(output_dir)), 1)
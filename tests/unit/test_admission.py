@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+from admission import AdmissionControl, TokenBucket
+
+
+class TestAdmission(unittest.TestCase):
+    def test_bucket_refill(self):
+        bucket = TokenBucket(rate=10, capacity=20, now=0)
+        self.assertEqual(bucket.take(20, now=0), 0)
+        self.assertAlmostEqual(bucket.take(5, now=0), 0.5)
+        self.assertEqual(bucket.take(5, now=0.5), 0)
+
+    def test_weighted_by_cost(self):
+        admission = AdmissionControl(rate=1, capacity=10)
+        self.assertEqual(admission.admit('greedy', 10), 0)
+        self.assertGreater(admission.admit('greedy', 1), 0)
+        self.assertEqual(admission.admit('polite', 1), 0)
+
+    def test_cost_over_capacity(self):
+        admission = AdmissionControl(rate=1, capacity=10)
+        self.assertEqual(admission.admit('greedy', 1000), 0)
+        self.assertAlmostEqual(admission.admit('greedy', 1), 991, places=0)
+        self.assertAlmostEqual(admission.admit('greedy', 1000), 1000, places=0)
+
+    def test_bucket_debt(self):
+        bucket = TokenBucket(rate=10, capacity=20, now=0)
+        self.assertEqual(bucket.take(100, now=0), 0)
+        self.assertEqual(bucket.tokens, -80)
+        self.assertAlmostEqual(bucket.take(20, now=0), 10)
+        self.assertEqual(bucket.take(20, now=10), 0)
+
+    def test_buckets_bounded(self):
+        admission = AdmissionControl(max_buckets=2)
+        for key in ('a', 'b', 'c'):
+            admission.admit(key)
+        self.assertEqual(list(admission.buckets), ['b', 'c'])
+
+    def test_shared_limit(self):
+        admission = AdmissionControl(shared_limit=5, shared_window=60)
+        store = mock.Mock()
+        store.incr.return_value = 5
+        self.assertEqual(admission.admit('a', 1, store), 0)
+        store.incr.return_value = 6
+        self.assertGreater(admission.admit('a', 1, store), 0)
+        store.incr.return_value = None
+        self.assertEqual(admission.admit('a', 1, store), 0)
+
+    def test_shared_backoff(self):
+        admission = AdmissionControl(shared_limit=5, shared_window=60, shared_backoff=60)
+        store = mock.Mock()
+        store.incr.return_value = None
+        self.assertEqual(admission.admit('a', 1, store), 0)
+        store.incr.return_value = 6
+        self.assertEqual(admission.admit('a', 1, store), 0)
+        self.assertEqual(store.incr.call_count, 1)
+        admission.shared_backoff = 0
+        self.assertGreater(admission.admit('a', 1, store), 0)
+        self.assertEqual(store.incr.call_count, 2)
@@ -0,0 +1,48 @@
+import gzip
+import unittest
+from unittest import mock
+import content_encoding
+from tests.testutils import cases
+
+
+class TestContentEncoding(unittest.TestCase):
+    def test_parse_accept_encoding(self):
+        codings = content_encoding.parse_accept_encoding("gzip;q=0.5, br, identity; q=0, zstd;q=x")
+        self.assertEqual(codings, {"gzip": 0.5, "br": 1.0, "identity": 0.0, "zstd": 0.0})
+
+    @cases(
+        [
+            [None, 2048, None],
+            ["", 2048, None],
+            ["gzip", 10, None],
+            ["gzip", 2048, "gzip"],
+            ["gzip;q=0", 2048, None],
+            ["br, *", 2048, "gzip"],
+            ["*, gzip;q=0", 2048, None],
+        ]
+    )
+    @mock.patch('content_encoding.get_zstandard', return_value=False)
+    def test_choose_encoding(self, case, mocked_zstandard):
+        header, size, encoding = case
+        self.assertEqual(content_encoding.choose_encoding(header, size), encoding)
+
+    @mock.patch('content_encoding.get_zstandard', return_value=mock.Mock())
+    def test_choose_zstd(self, mocked_zstandard):
+        self.assertEqual(content_encoding.choose_encoding("gzip, zstd", 2048), "zstd")
+        self.assertEqual(content_encoding.choose_encoding("gzip", 2048), "gzip")
+        self.assertEqual(content_encoding.choose_encoding("gzip;q=1, zstd;q=0.1", 2048), "gzip")
+        self.assertEqual(content_encoding.choose_encoding("gzip;q=0.5, zstd;q=0.5", 2048), "zstd")
+        self.assertEqual(content_encoding.choose_encoding("gzip;q=0.5, *;q=0.8", 2048), "zstd")
+
+    def test_gzip_roundtrip(self):
+        body = b'{"response": {"1": ["books", "hi-tech"]}}' * 100
+        self.assertEqual(gzip.decompress(content_encoding.compress(body, "gzip")), body)
+
+    def test_gzip_streaming(self):
+        c = content_encoding.compressor("gzip", level=1)
+        data = c.compress(b"a" * 1000) + c.compress(b"b" * 1000) + c.flush()
+        self.assertEqual(gzip.decompress(data), b"a" * 1000 + b"b" * 1000)
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(ValueError):
+            content_encoding.compressor("br")
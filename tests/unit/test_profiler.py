@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import signal
+import unittest
+from unittest import mock
+from collections import Counter
+import profiler
+from tests.testutils import cases
+
+
+def busy_wait(event):
+    while not event.is_set():
+        pass
+
+
+class TestProfiler(unittest.TestCase):
+    def test_sample_other_threads(self):
+        event = threading.Event()
+        thread = threading.Thread(target=busy_wait, args=(event,), name="worker")
+        thread.start()
+        try:
+            stacks = profiler.sample(0.05, interval=0.001)
+        finally:
+            event.set()
+            thread.join()
+        worker = [stack for stack in stacks if stack.startswith("worker;")]
+        self.assertTrue(worker)
+        self.assertTrue(all("busy_wait (test_profiler.py:" in stack for stack in worker))
+
+    def test_format_collapsed(self):
+        stacks = Counter({"main;a;b": 2, "main;a": 5})
+        self.assertEqual(profiler.format_collapsed(stacks), "main;a 5\nmain;a;b 2")
+
+    def test_slow_request_dump(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with profiler.SlowRequestProfiler(0, output_dir).profile("fast"):
+                pass
+            with profiler.SlowRequestProfiler(60, output_dir).profile("slow"):
+                pass
+            files = os.listdir(output_dir)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith("fast-") and files[0].endswith(".prof"))
+
+    @cases(["../escaped", "/tmp/escaped", "..", "a/../../b"])
+    def test_slow_request_dump_stays_in_output_dir(self, name):
+        with tempfile.TemporaryDirectory() as parent:
+            output_dir = os.path.join(parent, "profiles")
+            os.mkdir(output_dir)
+            with profiler.SlowRequestProfiler(0, output_dir).profile(name):
+                pass
+            self.assertEqual(os.listdir(parent), ["profiles"])
+            self.assertEqual(len(os.listdir(output_dir)), 1)
+
+    def test_single_run(self):
+        sampler = profiler.SamplingProfiler(interval=0.001)
+        self.assertTrue(sampler.start(1))
+        self.assertFalse(sampler.start(1))
+        sampler.thread.join()
+        self.assertFalse(sampler.running)
+        self.assertIsNotNone(sampler.result)
+
+    def test_start_from_signal_does_not_block(self):
+        sampler = profiler.SamplingProfiler(interval=0.001)
+        with sampler.lock:
+            self.assertFalse(sampler.start(1, blocking=False))
+        self.assertFalse(sampler.running)
+
+    @mock.patch('signal.signal')
+    def test_signal_handler_without_sigusr1(self, mocked_signal):
+        with mock.patch.object(signal, 'SIGUSR1', None):
+            self.assertFalse(profiler.SamplingProfiler().install_signal_handler())
+        mocked_signal.assert_not_called()
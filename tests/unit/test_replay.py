@@ -0,0 +1,55 @@
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from benchmarks import replay
+
+LOG = [
+    "[2026.10.19 12:00:00] I Starting server at 8080\n",
+    "[2026.10.19 12:00:00] I /method/: b'{\"login\": \"h&f\", \"method\": \"online_score\"}' a1\n",
+    "[2026.10.19 12:00:00] I {'request_id': 'a1', 'response': {'score': 3}, 'code': 200}\n",
+    "[2026.10.19 12:00:00] I /method/: b'{\"login\": \"admin\", \"method\": \"clients_interests\"}' a2\n",
+    "[2026.10.19 12:00:02] I /method/: b'{\"first_name\": \"\\xd0\\xa1\", \"method\": \"online_score\"}' a3\n",
+]
+
+
+class OKHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestReplay(unittest.TestCase):
+    def test_parse_log(self):
+        trace = replay.parse_log(LOG)
+        self.assertEqual([record["request_id"] for record in trace], ["a1", "a2", "a3"])
+        self.assertEqual([record["t"] for record in trace], [0, 0.5, 2])
+        self.assertEqual(trace[1]["body"]["method"], "clients_interests")
+        self.assertEqual(trace[2]["body"]["first_name"], "С")
+
+    def test_schedule(self):
+        trace = replay.parse_log(LOG)
+        self.assertEqual([t for t, _ in replay.schedule(trace, speed=2)], [0, 0.25, 1])
+        self.assertEqual([t for t, _ in replay.schedule(trace, rate=10)], [0, 0.1, 0.2])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(replay.percentile(values, 50), 50)
+        self.assertEqual(replay.percentile(values, 99.9), 100)
+        self.assertEqual(replay.percentile([], 50), None)
+
+    def test_run(self):
+        server = HTTPServer(("localhost", 0), OKHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            runner = replay.Replay("http://localhost:%s" % server.server_port, concurrency=2, resign_admin=True)
+            elapsed = runner.run(replay.schedule(replay.parse_log(LOG), rate=100))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(len(runner.results["online_score"]), 2)
+        self.assertEqual(dict(runner.codes["clients_interests"]), {200: 1})
+        self.assertIn("online_score", runner.report(elapsed))
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import scoring
+import snapshot
+from store import Store
+from tests.testutils import cases
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        snapshot.build(self.path, [(3, b'["pets"]'), (1, b'["cars", "travel"]'), (2, b'[]')])
+        self.snapshot = snapshot.InterestsSnapshot(self.path, check_interval=0)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @cases(
+        [
+            [1, b'["cars", "travel"]'],
+            [2, b'[]'],
+            [3, b'["pets"]'],
+            [0, None],
+            [4, None],
+        ]
+    )
+    def test_get(self, case):
+        cid, value = case
+        self.assertEqual(self.snapshot.get(cid), value)
+
+    def test_hot_swap(self):
+        snapshot.build(self.path, [(5, b'["geek"]')])
+        self.assertEqual(self.snapshot.get(5), b'["geek"]')
+        self.assertEqual(self.snapshot.get(1), None)
+        self.assertEqual(len(self.snapshot), 1)
+
+    def test_missing_file(self):
+        empty = snapshot.InterestsSnapshot(self.path + '.missing')
+        self.assertEqual(empty.get(1), None)
+
+    @cases([b'', b'ISNP'])
+    def test_bad_replacement_keeps_old_view(self, content):
+        snapshot.build(self.path, [(1, b'["cars", "travel"]')])
+        self.assertEqual(self.snapshot.get(1), b'["cars", "travel"]')
+        with open(self.path + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(self.path + '.tmp', self.path)
+        self.assertEqual(self.snapshot.get(1), b'["cars", "travel"]')
+        snapshot.build(self.path, [(5, b'["geek"]')])
+        self.assertEqual(self.snapshot.get(5), b'["geek"]')
+
+    @mock.patch('store.Store.get')
+    def test_file_appears_after_start(self, mocked_get):
+        mocked_get.return_value = None
+        path = self.path + '.late'
+        store = Store(snapshot=snapshot.InterestsSnapshot(path, check_interval=0))
+        try:
+            snapshot.build(path, [(7, b'["music"]')])
+            self.assertEqual(scoring.get_interests(store, 7), ["music"])
+        finally:
+            os.remove(path)
+        mocked_get.assert_not_called()
+
+    @mock.patch('store.Store.get')
+    def test_interests_from_snapshot(self, mocked_get):
+        store = Store(snapshot=self.snapshot)
+        self.assertEqual(scoring.get_interests(store, 1), ["cars", "travel"])
+        mocked_get.assert_not_called()
+
+    @mock.patch('store.Store.get')
+    def test_interests_fallback_to_store(self, mocked_get):
+        mocked_get.return_value = b'["music"]'
+        store = Store(snapshot=self.snapshot)
+        self.assertEqual(scoring.get_interests(store, 42), ["music"])
+        mocked_get.assert_called_once_with("i:42", deadline=None)
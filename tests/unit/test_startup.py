@@ -0,0 +1,23 @@
+import unittest
+from unittest import mock
+from store import Store
+from benchmarks import startup
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        _, modules = startup.measure('api')
+        for name in startup.LAZY_MODULES:
+            self.assertNotIn(name, modules)
+
+    def test_deferred_connection(self):
+        store = Store()
+        self.assertIsNone(store.client)
+        client = store.store
+        self.assertIs(store.store, client)
+
+    def test_reconnect_after_fork(self):
+        store = Store()
+        client = store.store
+        with mock.patch('os.getpid', return_value=store.pid + 1):
+            self.assertIsNot(store.store, client)
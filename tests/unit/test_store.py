@@ -0,0 +1,80 @@
+import os
+import time
+import unittest
+from unittest import mock
+import scoring
+from store import Store, DeadlineExceeded, NegativeCache
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.store = Store()
+        self.store.client = mock.Mock()
+        self.store.pid = os.getpid()
+
+    def test_deadline_stops_retries(self):
+        self.store.client.get.side_effect = TimeoutError
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            self.store.get('key', deadline=started + 0.1)
+        self.assertEqual(self.store.client.get.call_count, 1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_deadline_already_exceeded(self):
+        with self.assertRaises(DeadlineExceeded):
+            self.store.get('key', deadline=time.monotonic())
+        self.store.client.get.assert_not_called()
+
+    def test_within_deadline(self):
+        self.store.client.get.return_value = b'5'
+        self.assertEqual(self.store.get('key', deadline=time.monotonic() + 10), b'5')
+
+    def test_incr_deadline_exceeded(self):
+        with self.assertRaises(DeadlineExceeded):
+            self.store.incr('key', deadline=time.monotonic())
+        self.store.client.pipeline.assert_not_called()
+
+    def test_score_deadline_exceeded_on_cache_get(self):
+        self.store.client.get.side_effect = TimeoutError
+        score = scoring.get_score(self.store, phone="79175002040", email="stupnikov@otus.ru",
+                                  deadline=time.monotonic() + 0.1)
+        self.assertEqual(score, 3)
+        self.assertEqual(self.store.client.get.call_count, 1)
+
+    def test_negative_cache(self):
+        self.store.client.get.return_value = None
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                scoring.get_interests(self.store, 1)
+        self.assertEqual(self.store.client.get.call_count, 1)
+        self.assertEqual(self.store.missing.stats()["hits"], 2)
+
+    def test_negative_cache_invalidated_on_set(self):
+        self.store.client.get.return_value = None
+        with self.assertRaises(ValueError):
+            scoring.get_interests(self.store, 1)
+        self.store.set('i:1', '["cars"]')
+        self.store.client.get.return_value = b'["cars"]'
+        self.assertEqual(scoring.get_interests(self.store, 1), ["cars"])
+        self.assertEqual(self.store.missing.stats()["invalidations"], 1)
+
+    def test_negative_cache_ttl(self):
+        missing = NegativeCache(ttl=0)
+        missing.add('i:1')
+        self.assertNotIn('i:1', missing)
+        self.assertEqual(missing.stats()["size"], 0)
+
+    def test_negative_cache_stats_skip_expired(self):
+        missing = NegativeCache(ttl=60)
+        missing.add('i:1')
+        missing.ttl = 0
+        missing.add('i:2')
+        self.assertEqual(missing.stats()["size"], 1)
+        self.assertEqual(list(missing.keys), ['i:1'])
+
+    def test_negative_cache_bounded(self):
+        missing = NegativeCache(size=2)
+        for key in ('i:1', 'i:2', 'i:3'):
+            missing.add(key)
+        self.assertNotIn('i:1', missing)
+        self.assertIn('i:3', missing)